@@ -0,0 +1,157 @@
+import asyncio
+import time
+from collections import deque
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+
+class Limiter:
+    """
+    Адаптивний ліміт одночасних запитів (AIMD).
+
+    - **limit**: початкова кількість запитів, що виконуються одночасно
+    - **min_limit**, **max_limit**: межі, в яких ліміт підлаштовується
+    - **target_latency**: якщо запит довший, ліміт зменшується у `backoff` разів (не частіше
+      ніж раз за `target_latency`), інакше росте на 1/limit — але лише коли ліміт був вичерпаний
+    - **max_queue**: скільки запитів можуть чекати на вільне місце
+    - **queue_timeout**: скільки секунд запит може чекати в черзі перед відмовою
+    """
+
+    def __init__(self, limit: int, min_limit: int = 1, max_limit: int = None, target_latency: float = 0.5,
+                 backoff: float = 0.9, max_queue: int = None, queue_timeout: float = 1.0):
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit or limit * 4
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.max_queue = max_queue if max_queue is not None else limit * 2
+        self.queue_timeout = queue_timeout
+
+        self.last_decrease = 0.0
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.waiters = deque()
+
+    @property
+    def waiting(self):
+        return len(self.waiters)
+
+    def has_slot(self):
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self):
+        if self.has_slot() and not self.waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.queued += 1
+
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Місце могли видати в ту ж мить, коли спрацював таймаут
+            if not (waiter.done() and not waiter.cancelled()):
+                self.rejected += 1
+                return False
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+        self.admitted += 1
+        return True
+
+    def release(self, latency: float):
+        # Швидкі запити при неповному завантаженні нічого не кажуть про запас потужності
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+
+        if latency > self.target_latency:
+            # Повільні запити однієї хвилі — це одна подія перевантаження, а не десятки
+            now = time.monotonic()
+            if now - self.last_decrease > self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = now
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        # Місце передається першому в черзі напряму, щоб нові запити не обганяли тих, хто чекає
+        while self.waiters and self.has_slot():
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def metrics(self):
+        return {
+            'limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'rejected': self.rejected,
+        }
+
+
+# Синхронні endpoints виконуються в пулі потоків AnyIO на 40 потоків. Сума max_limit
+# не перевищує його, інакше зайві запити тихо чекали б на потік поза контролем лімітів
+THREADPOOL_SIZE = 40
+
+# Окремі групи для дорогих endpoints, щоб їх перевантаження не зачіпало обміни
+LIMITERS = {
+    ('POST', '/login'): Limiter(limit=4, max_limit=6, target_latency=1.0, queue_timeout=0.5),
+    ('POST', '/register'): Limiter(limit=4, max_limit=6, target_latency=1.0, queue_timeout=0.5),
+    ('GET', '/skills'): Limiter(limit=8, max_limit=12, target_latency=0.3, queue_timeout=0.5),
+}
+
+DEFAULT_LIMITER = Limiter(limit=12, max_limit=16, max_queue=64, target_latency=0.5, queue_timeout=2.0)
+
+if sum(limiter.max_limit for limiter in LIMITERS.values()) + DEFAULT_LIMITER.max_limit > THREADPOOL_SIZE:
+    raise RuntimeError('Сума max_limit більша за пул потоків')
+
+RETRY_AFTER = 1
+
+
+def admission_metrics():
+    metrics = {f'{method} {path}': limiter.metrics() for (method, path), limiter in LIMITERS.items()}
+    metrics['default'] = DEFAULT_LIMITER.metrics()
+    return metrics
+
+
+class AdmissionMiddleware:
+    """Обмежує кількість одночасних запитів для кожної групи endpoints і швидко віддає 503 при перевантаженні"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        limiter = LIMITERS.get((scope['method'], scope['path'].rstrip('/') or '/'), DEFAULT_LIMITER)
+
+        if not await limiter.acquire():
+            res = JSONResponse(
+                {'detail': 'Service overloaded, try again later'},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(RETRY_AFTER)}
+            )
+            await res(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
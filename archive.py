@@ -0,0 +1,105 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+from db import engine, Exchange, ExchangeArchive
+from models import ExchangeResponse
+from fieldsets import select_columns
+from jobs import periodic
+
+load_dotenv()
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 90))
+ARCHIVE_INTERVAL_MINUTES = int(os.getenv('ARCHIVE_INTERVAL_MINUTES', 60))
+BATCH_SIZE = 5000
+
+COLUMNS = ['id', 'sender_id', 'receiver_id', 'skill_id', 'message', 'created_at', 'updated_at']
+
+
+def archive_exchanges(db: Session, before: datetime = None, batch_size: int = BATCH_SIZE):
+    """
+    Перенести обміни, створені раніше за `before`, у таблицю exchange_archive.
+
+    Переносить пакетами по `batch_size` рядків, кожен пакет — окрема транзакція,
+    щоб не тримати довгі блокування на гарячій таблиці.
+    """
+    before = before or datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    moved = 0
+
+    while True:
+        ids = db.exec(
+            select(Exchange.id).where(Exchange.created_at < before).order_by(Exchange.id).limit(batch_size)
+        ).all()
+
+        if not ids:
+            return moved
+
+        source = select(*[getattr(Exchange, name) for name in COLUMNS]).where(Exchange.id.in_(ids))
+        db.execute(insert(ExchangeArchive).from_select(COLUMNS, source))
+        db.execute(delete(Exchange).where(Exchange.id.in_(ids)))
+        db.commit()
+
+        moved += len(ids)
+
+
+def user_exchanges(db: Session, fields: str = None, since: datetime = None, include_archived: bool = False, **filters):
+    """
+    Обміни користувача від найновіших, з гарячої таблиці та, за потреби, з архіву.
+
+    - **since**: лише обміни, створені починаючи з цього часу; якщо це раніше
+      за межу архівації, архів теж переглядається
+    - **include_archived**: завжди шукати також в exchange_archive
+    """
+    cutoff = datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    models = [Exchange]
+
+    if include_archived or (since and since < cutoff):
+        models.append(ExchangeArchive)
+
+    rows = []
+    seen = set()
+
+    for model in models:
+        if fields:
+            # id і created_at потрібні для дедуплікації та сортування, навіть якщо їх не просили
+            columns = select_columns(fields, model, ExchangeResponse)
+            query = db.query(*columns, model.id.label('_id'), model.created_at.label('_sort'))
+        else:
+            query = db.query(model)
+
+        query = query.filter_by(**filters)
+
+        if since:
+            query = query.filter(model.created_at >= since)
+
+        # Таблиці читаються окремими запитами, тож обмін, перенесений в архів між ними,
+        # знайдеться двічі — лишаємо рядок з гарячої таблиці, вона читається першою
+        for row in query.all():
+            key = row._id if fields else row.id
+
+            if key not in seen:
+                seen.add(key)
+                rows.append(row)
+
+    if fields:
+        rows.sort(key=lambda row: row._sort, reverse=True)
+        return [{k: v for k, v in row._asdict().items() if k not in ('_id', '_sort')} for row in rows]
+
+    rows.sort(key=lambda row: row.created_at, reverse=True)
+    return rows
+
+
+@periodic('archive_exchanges', timedelta(minutes=ARCHIVE_INTERVAL_MINUTES))
+def archive_exchanges_job():
+    with Session(engine) as db:
+        archive_exchanges(db)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['run']:
+        sys.exit('usage: python archive.py run')
+
+    with Session(engine) as db:
+        print(f'archived {archive_exchanges(db)} exchanges')
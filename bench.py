@@ -0,0 +1,303 @@
+import os
+import sys
+import time
+import shutil
+import subprocess
+import multiprocessing
+import tempfile
+from datetime import datetime, timedelta
+import json
+import random
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+
+def wait_ready(url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{url} не відповідає')
+
+
+def client(args):
+    url, requests, concurrency = args
+
+    def hit(_):
+        urllib.request.urlopen(url).read()
+
+    start = time.process_time()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(hit, range(requests)))
+    return time.process_time() - start
+
+
+def hammer(url: str, requests: int, concurrency: int, processes: int):
+    """
+    Навантаження з кількох процесів-клієнтів, щоб клієнт не впирався в GIL.
+
+    Повертає req/s та кількість ядер, які зайняв сам клієнт: якщо вона близька
+    до `processes`, вузьке місце — клієнт, а не сервер.
+    """
+    jobs = [(url, requests // processes, max(concurrency // processes, 1))] * processes
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        cpu = sum(pool.map(client, jobs))
+    wall = time.perf_counter() - start
+
+    return requests // processes * processes / wall, cpu / wall
+
+
+def wrk(url: str, concurrency: int, threads: int, duration: int = 10):
+    out = subprocess.run(
+        ['wrk', f'-t{threads}', f'-c{concurrency}', f'-d{duration}s', url],
+        capture_output=True, text=True, check=True
+    ).stdout
+
+    for line in out.splitlines():
+        if line.startswith('Requests/sec:'):
+            return float(line.split()[1])
+
+
+def bench_workers(path: str = '/', requests: int = 20000, concurrency: int = 128, client_processes: int = None):
+    """
+    Пропускна здатність server.py при різній кількості воркерів.
+
+    Якщо встановлено `wrk`, навантаження генерує він, інакше — `client_processes`
+    процесів на Python (за замовчуванням половина ядер).
+    """
+    url = f'http://{HOST}:{PORT}{path}'
+    counts = [1, 2, 4, os.cpu_count()]
+    client_processes = client_processes or max(os.cpu_count() // 2, 1)
+
+    for workers in sorted(set(counts)):
+        env = dict(os.environ, WORKERS=str(workers), HOST=HOST, PORT=str(PORT))
+        proc = subprocess.Popen([sys.executable, 'server.py'], env=env)
+
+        try:
+            wait_ready(url)
+
+            if shutil.which('wrk'):
+                rps = wrk(url, concurrency, client_processes)
+                print(f'workers={workers:<3} {rps:10.0f} req/s (wrk)')
+            else:
+                rps, client_cpu = hammer(url, requests, concurrency, client_processes)
+                print(f'workers={workers:<3} {rps:10.0f} req/s  client cpu {client_cpu:.1f}/{client_processes} cores')
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def fake_skills(count: int):
+    return [
+        {
+            'id': i,
+            'title': f'Skill {i}',
+            'description': f'Навичка {i}: детальний опис, який займає помітну частину відповіді. ' * 3,
+            'category': 'programming',
+            'level': 'intermediate',
+            'can_teach': i % 2 == 0,
+            'want_learn': i % 3 == 0,
+            'created_at': '2025-12-09T20:02:56.381140',
+            'updated_at': '2025-12-09T20:02:56.381140',
+        }
+        for i in range(count)
+    ]
+
+
+def bench_compression(sizes=(10, 100, 1000), rounds: int = 50):
+    """Розмір відповіді та час CPU на стиснення для типових списків навичок"""
+    from compression import ENCODERS
+
+    for count in sizes:
+        skills = fake_skills(count)
+        variants = {
+            'full': skills,
+            'fields=id,title': [{'id': s['id'], 'title': s['title']} for s in skills],
+        }
+
+        for label, payload in variants.items():
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            print(f'{count:>5} items {label:<16} identity {len(body):>9} B')
+
+            for name, encode in ENCODERS.items():
+                start = time.process_time()
+                for _ in range(rounds):
+                    encoded = encode(body)
+                cpu = (time.process_time() - start) / rounds * 1e6
+                print(f'{"":>5}       {"":<16} {name:<8} {len(encoded):>9} B {cpu:10.1f} us')
+
+
+def bench_db(url: str = 'sqlite://'):
+    # Окрема база, щоб бенчмарк ніколи не торкався DB_URL з .env.
+    # db.engine створюється при першому імпорті, тому кожен бенчмарк з базою запускається в окремому процесі
+    if 'db' in sys.modules:
+        raise RuntimeError('db is already imported, run this benchmark alone: python bench.py <name>')
+
+    os.environ['DB_URL'] = url
+
+    from sqlmodel import SQLModel
+    from db import engine
+
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def bench_recommendations(users: int = 5000, skills: int = 500, per_user: int = 5, exchanges: int = 20000, reads: int = 10000):
+    """Повний rebuild, читання top-K та інкрементальні оновлення рекомендацій"""
+    engine = bench_db()
+
+    from sqlmodel import Session
+    from db import Exchange, UserSkillLink
+    from recommendations import rebuild, get_recommendations, skill_link_changed, exchange_created, refresh_recommendations
+
+    rnd = random.Random(42)
+
+    with Session(engine) as db:
+        for user_id in range(1, users + 1):
+            for skill_id in rnd.sample(range(1, skills + 1), per_user):
+                db.add(UserSkillLink(user_id=user_id, skill_id=skill_id))
+
+        for _ in range(exchanges):
+            sender_id, receiver_id = rnd.sample(range(1, users + 1), 2)
+            db.add(Exchange(sender_id=sender_id, receiver_id=receiver_id, skill_id=rnd.randint(1, skills), message='hi'))
+
+        db.commit()
+
+        start = time.perf_counter()
+        rebuilt = rebuild(db)
+        print(f'rebuild      {rebuilt} users in {time.perf_counter() - start:.2f} s')
+
+        start = time.perf_counter()
+        for _ in range(reads):
+            get_recommendations(db, rnd.randint(1, users))
+        print(f'read top-K   {(time.perf_counter() - start) / reads * 1e6:10.1f} us/op')
+
+    updates = 100
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        user_id, skill_id = rnd.randint(1, users), rnd.randint(1, skills)
+        with Session(engine) as db:
+            if db.get(UserSkillLink, (user_id, skill_id)):
+                continue
+            db.add(UserSkillLink(user_id=user_id, skill_id=skill_id))
+            db.commit()
+        skill_link_changed(user_id, skill_id)
+    print(f'link added   {(time.perf_counter() - start) / updates * 1e3:10.1f} ms/op')
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        sender_id, receiver_id = rnd.sample(range(1, users + 1), 2)
+        with Session(engine) as db:
+            exchange = Exchange(sender_id=sender_id, receiver_id=receiver_id, skill_id=rnd.randint(1, skills), message='hi')
+            db.add(exchange)
+            db.commit()
+            exchange_id = exchange.id
+        exchange_created(exchange_id)
+    print(f'exchange     {(time.perf_counter() - start) / updates * 1e3:10.1f} ms/op')
+
+    # Один відкладений перерахунок на всі позначені списки
+    start = time.perf_counter()
+    refresh_recommendations()
+    print(f'refresh      {time.perf_counter() - start:10.2f} s for {2 * updates} events')
+
+
+def bench_archive(rows: int = 10_000_000, steps: int = 5, users: int = 10000, days: int = 3 * 365, reads: int = 500):
+    """Затримка вхідних обмінів при зростанні таблиці exchange до `rows` рядків"""
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = bench_db(f'sqlite:///{path}')
+
+    from sqlalchemy import insert
+    from sqlmodel import Session
+    from db import Exchange
+    from archive import archive_exchanges, user_exchanges, ARCHIVE_AFTER_DAYS
+
+    rnd = random.Random(42)
+    start_at = datetime(2023, 1, 1)
+    step_rows = rows // steps
+    chunk = 50000
+    seeded = 0
+
+    def inbox_latency(include_archived: bool = False):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            for _ in range(reads):
+                user_exchanges(db, include_archived=include_archived, receiver_id=rnd.randint(1, users))
+            return (time.perf_counter() - start) / reads * 1e3
+
+    for step in range(1, steps + 1):
+        with Session(engine) as db:
+            for offset in range(0, step_rows, chunk):
+                batch = []
+                for i in range(seeded, seeded + min(chunk, step_rows - offset)):
+                    created_at = start_at + timedelta(days=days * i / rows)
+                    batch.append({
+                        'sender_id': rnd.randint(1, users),
+                        'receiver_id': rnd.randint(1, users),
+                        'skill_id': rnd.randint(1, 500),
+                        'message': 'hi',
+                        'created_at': created_at,
+                        'updated_at': created_at,
+                    })
+                db.execute(insert(Exchange), batch)
+                seeded += len(batch)
+            db.commit()
+
+            now = start_at + timedelta(days=days * seeded / rows)
+            moved = archive_exchanges(db, before=now - timedelta(days=ARCHIVE_AFTER_DAYS))
+
+        print(
+            f'{seeded:>10} rows (archived {moved:>9})  '
+            f'inbox {inbox_latency():8.2f} ms  '
+            f'inbox+archive {inbox_latency(include_archived=True):8.2f} ms'
+        )
+
+
+def bench_tokens(count: int = 100000):
+    """Кількість access-токенів за секунду: jwt.encode проти попередньо підготовленого sign()"""
+    os.environ.setdefault('SECRET_KEY', 'bench-secret-key-of-at-least-32-bytes')
+    os.environ.setdefault('ALGHORITM', 'HS256')
+
+    import jwt
+    from tokens import create_access, SECRET_KEY, ALGORITHM, ACCESS_TTL
+
+    user = {'id': 42, 'username': 'bench'}
+
+    start = time.perf_counter()
+    for _ in range(count):
+        payload = {**user, 'type': 'access', 'exp': int(time.time()) + ACCESS_TTL}
+        jwt.encode(payload=payload, key=SECRET_KEY, algorithm=ALGORITHM)
+    print(f'jwt.encode     {count / (time.perf_counter() - start):10.0f} tokens/s')
+
+    start = time.perf_counter()
+    for _ in range(count):
+        create_access(user)
+    print(f'create_access  {count / (time.perf_counter() - start):10.0f} tokens/s')
+
+
+BENCHES = {
+    'workers': bench_workers,
+    'compression': bench_compression,
+    'recommendations': bench_recommendations,
+    'archive': bench_archive,
+    'tokens': bench_tokens,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHES)
+
+    if len(names) == 1:
+        print(f'--- {names[0]}')
+        BENCHES[names[0]]()
+    else:
+        for name in names:
+            subprocess.run([sys.executable, __file__, name], check=True)
@@ -0,0 +1,130 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+MIN_SIZE = 500
+
+
+def _gzip(body: bytes):
+    return gzip.compress(body, compresslevel=6)
+
+
+def _brotli(body: bytes):
+    return brotli.compress(body, quality=4)
+
+
+def _zstd(body: bytes):
+    return zstandard.ZstdCompressor(level=3).compress(body)
+
+
+# Порядок задає пріоритет сервера, якщо клієнт приймає кілька кодувань
+ENCODERS = {}
+
+if zstandard:
+    ENCODERS['zstd'] = _zstd
+
+if brotli:
+    ENCODERS['br'] = _brotli
+
+ENCODERS['gzip'] = _gzip
+
+
+def choose_encoding(accept_encoding: str):
+    accepted = set()
+    refused = set()
+
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+
+        if name and q > 0:
+            accepted.add(name)
+        elif name:
+            refused.add(name)
+
+    # `*` означає будь-яке кодування, крім явно відхилених через q=0
+    for name in ENCODERS:
+        if name in accepted or ('*' in accepted and name not in refused):
+            return name
+
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Стискає відповіді gzip/brotli/zstd залежно від Accept-Encoding.
+
+    - **min_size**: відповіді, менші за цей розмір у байтах, не стискаються
+    - brotli та zstd використовуються лише якщо встановлені пакети `brotli` / `zstandard`
+    """
+
+    def __init__(self, app, min_size: int = MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ''
+        for key, value in scope['headers']:
+            if key == b'accept-encoding':
+                accept_encoding = value.decode('latin-1')
+
+        encoding = choose_encoding(accept_encoding)
+        start = None
+        chunks = []
+
+        async def send_compressed(message):
+            nonlocal start
+
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            chunks.append(message.get('body', b''))
+
+            if message.get('more_body', False):
+                return
+
+            body = b''.join(chunks)
+            headers = [(k, v) for k, v in start['headers'] if k != b'content-length']
+            already_encoded = any(k == b'content-encoding' for k, _ in headers)
+
+            if encoding and len(body) >= self.min_size and not already_encoded:
+                body = ENCODERS[encoding](body)
+                headers.append((b'content-encoding', encoding.encode()))
+
+            # Відповідь залежить від Accept-Encoding навіть коли вона не стиснута
+            if not any(k == b'vary' and b'accept-encoding' in v.lower() for k, v in headers):
+                headers.append((b'vary', b'Accept-Encoding'))
+
+            headers.append((b'content-length', str(len(body)).encode()))
+
+            await send({**start, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_compressed)
@@ -6,12 +6,23 @@ from dotenv import load_dotenv
 from datetime import datetime
 from typing import List, Optional
 import bcrypt
+from importlib import import_module
 
 load_dotenv()
 
 DB_URL = os.getenv('DB_URL')
 
-engine = create_engine(DB_URL)
+engine = create_engine(DB_URL, pool_pre_ping=True)
+
+
+def reset_engine():
+    # Після fork дочірній процес не повинен використовувати з'єднання батьківського пулу
+    engine.dispose(close=False)
+
+
+def warm_up():
+    with engine.connect() as conn:
+        conn.exec_driver_sql('SELECT 1')
 
 
 class UserSkillLink(SQLModel, table=True):
@@ -66,12 +77,12 @@ class Skill(SQLModel, table=True):
 class Exchange(SQLModel, table=True):
     id: Optional[int] = Field(primary_key=True, default=None)
 
-    sender_id: int = Field(foreign_key="user.id")
-    receiver_id: int = Field(foreign_key="user.id")
+    sender_id: int = Field(foreign_key="user.id", index=True)
+    receiver_id: int = Field(foreign_key="user.id", index=True)
     skill_id: int = Field(foreign_key="skill.id")
 
     message: str = Field()
-    created_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
     updated_at: datetime = Field(default_factory=datetime.now)
 
     sender: User = Relationship(
@@ -86,6 +97,73 @@ class Exchange(SQLModel, table=True):
     skill: Skill = Relationship(back_populates="exchanges")
 
 
+class ExchangeArchive(SQLModel, table=True):
+    __tablename__ = 'exchange_archive'
+
+    id: int = Field(primary_key=True)
+    sender_id: int = Field(index=True)
+    receiver_id: int = Field(index=True)
+    skill_id: int = Field()
+    message: str = Field()
+    created_at: datetime = Field(index=True)
+    updated_at: datetime = Field()
+
+
+class SkillPair(SQLModel, table=True):
+    skill_id: int = Field(foreign_key='skill.id', primary_key=True)
+    other_id: int = Field(foreign_key='skill.id', primary_key=True)
+    weight: float = Field(default=0)
+
+
+class Recommendation(SQLModel, table=True):
+    user_id: int = Field(foreign_key='user.id', primary_key=True)
+    skill_ids: bytes = Field(default=b'')
+    stale: bool = Field(default=False, index=True)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+
+class UserSession(SQLModel, table=True):
+    jti: str = Field(primary_key=True, max_length=22)
+    family: str = Field(max_length=22, index=True)
+    user_id: int = Field(foreign_key='user.id', index=True)
+    revoked: bool = Field(default=False)
+    expires_at: datetime = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class Outbox(SQLModel, table=True):
+    id: Optional[int] = Field(primary_key=True, default=None)
+    task: str = Field(max_length=100)
+    payload: str = Field(default='{}')
+    status: str = Field(max_length=20, default='pending', index=True)
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None)
+    run_at: datetime = Field(default_factory=datetime.now, index=True)
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+
+def upsert(db: Session, model, rows: List[dict], keys: List[str], values):
+    """
+    Атомарний INSERT ... ON CONFLICT DO UPDATE для `rows`.
+
+    `values(new)` повертає колонки, які треба оновити при конфлікті за `keys`;
+    `new` — значення рядка, який не вдалося вставити.
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        stmt = import_module(f'sqlalchemy.dialects.{dialect}').insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_=values(stmt.excluded))
+    elif dialect in ('mysql', 'mariadb'):
+        stmt = import_module('sqlalchemy.dialects.mysql').insert(model).values(rows)
+        stmt = stmt.on_duplicate_key_update(values(stmt.inserted))
+    else:
+        raise NotImplementedError(f'upsert is not supported for {dialect}')
+
+    db.execute(stmt)
+
+
 def get_db():
     with Session(engine) as session:
         yield session
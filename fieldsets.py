@@ -0,0 +1,24 @@
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def select_columns(fields: str, db_model, response_model: type[BaseModel]):
+    """
+    Перетворює `fields=title,level` на список колонок таблиці.
+
+    Дозволені лише поля моделі відповіді, тому приховані колонки
+    (наприклад, `password`) вибрати неможливо.
+    """
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in response_model.model_fields]
+
+    if not names or unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Невідомі поля: {', '.join(unknown) or fields}")
+
+    return [getattr(db_model, name) for name in dict.fromkeys(names)]
+
+
+def sparse_response(rows):
+    return JSONResponse(jsonable_encoder([row if isinstance(row, dict) else row._asdict() for row in rows]))
@@ -0,0 +1,274 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import update
+from sqlmodel import Session, select
+from db import engine, Outbox
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BASE_DELAY = 2
+MAX_DELAY = 600
+BATCH_SIZE = 50
+LEASE = timedelta(seconds=60)
+HEARTBEAT = 15
+
+TASKS = {}
+PERIODIC = {}
+
+
+def task(name: str):
+    """Зареєструвати функцію як фонову задачу з іменем `name`"""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(db: Session, name: str, run_at: datetime = None, **payload):
+    """
+    Додати задачу в outbox у поточній транзакції.
+
+    Задача буде виконана лише після `db.commit()` викликаючого коду,
+    тож вона не загубиться при перезапуску і не виконається, якщо транзакцію відкочено.
+    `run_at` відкладає виконання до вказаного часу.
+    """
+    if name not in TASKS:
+        raise KeyError(f'Unknown task {name}')
+
+    job = Outbox(task=name, payload=json.dumps(payload), run_at=run_at or datetime.now())
+    db.add(job)
+    return job
+
+
+def is_scheduled(db: Session, name: str, statuses=('pending', 'running')):
+    query = select(Outbox.id).where(Outbox.task == name, Outbox.status.in_(statuses))
+    return db.exec(query).first() is not None
+
+
+def periodic(name: str, interval: timedelta):
+    """
+    Зареєструвати функцію як задачу `name`, що повторюється кожні `interval`.
+
+    Після кожного запуску, навіть невдалого, задача планує наступний, якщо в черзі
+    ще немає іншого. Перший запуск ставить `schedule_periodic()` при старті.
+    """
+    def decorator(func):
+        @wraps(func)
+        def run(**payload):
+            try:
+                func(**payload)
+            finally:
+                with Session(engine) as db:
+                    if not is_scheduled(db, name, statuses=('pending',)):
+                        enqueue(db, name, run_at=datetime.now() + interval)
+                        db.commit()
+
+        PERIODIC[name] = interval
+        task(name)(run)
+        return run
+    return decorator
+
+
+def schedule_periodic():
+    """Поставити в чергу кожну періодичну задачу, якої ще немає в outbox"""
+    with Session(engine) as db:
+        for name in PERIODIC:
+            if not is_scheduled(db, name):
+                enqueue(db, name)
+        db.commit()
+
+
+def backoff(attempts: int):
+    return timedelta(seconds=min(BASE_DELAY * 2 ** (attempts - 1), MAX_DELAY))
+
+
+def claim(db: Session, job_id: int):
+    # Кілька воркерів можуть побачити ту саму задачу, виконує її лише той, хто перший змінив статус.
+    # Спроба рахується одразу при захопленні: якщо процес впаде, вона вже збережена
+    result = db.execute(
+        update(Outbox)
+        .where(Outbox.id == job_id, Outbox.status == 'pending')
+        .values(status='running', attempts=Outbox.attempts + 1, updated_at=datetime.now())
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def heartbeat(job_id: int, done: threading.Event):
+    # Поки задача виконується, продовжуємо її оренду, щоб recover_stale не запустив другу копію
+    while not done.wait(HEARTBEAT):
+        try:
+            with Session(engine) as db:
+                db.execute(
+                    update(Outbox)
+                    .where(Outbox.id == job_id, Outbox.status == 'running')
+                    .values(updated_at=datetime.now())
+                )
+                db.commit()
+        except Exception:
+            logger.exception('Heartbeat for job %s failed', job_id)
+
+
+def run_job(job_id: int):
+    with Session(engine) as db:
+        if not claim(db, job_id):
+            return
+
+        job = db.get(Outbox, job_id)
+
+        done = threading.Event()
+        threading.Thread(target=heartbeat, args=(job_id, done), name=f'job-{job_id}-heartbeat', daemon=True).start()
+
+        try:
+            TASKS[job.task](**json.loads(job.payload))
+        except Exception as e:
+            logger.exception('Job %s (%s) failed', job.id, job.task)
+            job.last_error = repr(e)
+
+            if job.attempts >= MAX_ATTEMPTS:
+                job.status = 'failed'
+            else:
+                job.status = 'pending'
+                job.run_at = datetime.now() + backoff(job.attempts)
+        else:
+            job.status = 'done'
+            job.last_error = None
+        finally:
+            done.set()
+
+        job.updated_at = datetime.now()
+        db.commit()
+
+
+def due_jobs(limit: int = BATCH_SIZE, exclude=()):
+    with Session(engine) as db:
+        query = (
+            select(Outbox.id)
+            .where(Outbox.status == 'pending', Outbox.run_at <= datetime.now())
+            .order_by(Outbox.run_at)
+            .limit(limit)
+        )
+
+        if exclude:
+            query = query.where(Outbox.id.notin_(exclude))
+
+        return db.exec(query).all()
+
+
+def recover_stale(lease: timedelta = LEASE):
+    """
+    Повернути в чергу задачі, оренда яких закінчилась.
+
+    Оренду продовжує heartbeat, поки задача виконується, тож прострочена оренда
+    означає, що процес, який її виконував, впав. Задача, що вже вичерпала
+    MAX_ATTEMPTS, позначається failed, щоб вона не валила воркери безкінечно.
+    """
+    with Session(engine) as db:
+        expired = (Outbox.status == 'running', Outbox.updated_at < datetime.now() - lease)
+
+        db.execute(
+            update(Outbox)
+            .where(*expired, Outbox.attempts >= MAX_ATTEMPTS)
+            .values(status='failed', last_error='Lease expired', updated_at=datetime.now())
+        )
+        db.execute(
+            update(Outbox)
+            .where(*expired, Outbox.attempts < MAX_ATTEMPTS)
+            .values(status='pending', updated_at=datetime.now())
+        )
+        db.commit()
+
+
+class JobQueue:
+    """
+    Фоновий обробник outbox у пулі потоків.
+
+    - **concurrency**: максимум задач, що виконуються одночасно
+    - **poll_interval**: як часто перевіряти outbox, якщо немає сигналу `notify()`
+    """
+
+    def __init__(self, concurrency: int = 4, poll_interval: float = 1.0):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.pool = None
+        self.thread = None
+
+    def start(self):
+        recover_stale()
+        self.stopping.clear()
+        self.pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix='job')
+        self.thread = threading.Thread(target=self.loop, name='job-poller', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+        if self.thread:
+            self.thread.join()
+        if self.pool:
+            self.pool.shutdown(wait=True)
+
+    def notify(self):
+        self.wakeup.set()
+
+    def loop(self):
+        in_flight = {}
+        last_recover = time.monotonic()
+
+        while not self.stopping.is_set():
+            self.wakeup.clear()
+            job_ids = []
+
+            for future in [f for f in in_flight if f.done()]:
+                del in_flight[future]
+
+            try:
+                if time.monotonic() - last_recover > LEASE.total_seconds():
+                    recover_stale()
+                    last_recover = time.monotonic()
+
+                # Пул завжди заповнений до concurrency: повільна задача не тримає інші
+                free = self.concurrency - len(in_flight)
+                if free > 0:
+                    job_ids = due_jobs(free, exclude=list(in_flight.values()))
+
+                for job_id in job_ids:
+                    future = self.pool.submit(run_job, job_id)
+                    future.add_done_callback(lambda _: self.wakeup.set())
+                    in_flight[future] = job_id
+            except Exception:
+                logger.exception('Job poller failed')
+
+            if not job_ids or len(in_flight) >= self.concurrency:
+                self.wakeup.wait(self.poll_interval)
+
+    def drain(self):
+        """Синхронно виконати всі задачі, що вже готові до запуску (для тестів)"""
+        while True:
+            ids = due_jobs()
+            if not ids:
+                return
+            for job_id in ids:
+                run_job(job_id)
+
+
+queue = JobQueue()
+
+
+@task('welcome_email')
+def welcome_email(user_id: int):
+    logger.info('Welcome email for user %s', user_id)
+
+
+@task('notify_receiver')
+def notify_receiver(exchange_id: int):
+    logger.info('Notify receiver about exchange %s', exchange_id)
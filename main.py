@@ -5,10 +5,33 @@ from models import SkillCreate, SkillResponse, SkillLevel, SkillCategory, SkillU
 from sqlalchemy.orm import Session
 from db import get_db, Skill, User, Exchange
 from typing import List
-from tokens import create_access, create_refresh, verify_user, verify_token
+from datetime import datetime
+from tokens import verify_user, verify_token
+from sessions import start_session, rotate, revoke_all, set_auth_cookies, clear_auth_cookies
+from compression import CompressionMiddleware
+from admission import AdmissionMiddleware, admission_metrics
+from fieldsets import select_columns, sparse_response
+from jobs import enqueue, queue, schedule_periodic
+from recommendations import get_recommendations
+from archive import user_exchanges
 
 app = FastAPI()
 
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(AdmissionMiddleware)
+
+
+@app.on_event('startup')
+def start_jobs():
+    queue.start()
+    schedule_periodic()
+
+
+@app.on_event('shutdown')
+def stop_jobs():
+    queue.stop()
+
+
 @app.get("/", tags=["General"])
 def root():
     """Головна сторінка API з інформацією про доступні endpoints"""
@@ -24,6 +47,12 @@ def root():
     }
 
  
+@app.get('/metrics/admission', tags=['General'])
+def get_admission_metrics():
+    """Лічильники прийнятих, поставлених у чергу та відхилених запитів для кожної групи endpoints"""
+    return admission_metrics()
+
+
 @app.post('/skills', response_model=SkillResponse, status_code=status.HTTP_201_CREATED, tags=['Skills'])
 def add_skill(skill: SkillCreate, db: Session = Depends(get_db)):
     """
@@ -52,6 +81,7 @@ def get_skills(
     level: SkillLevel = Query(None, description='Skill level'),
     can_teach: bool = Query(None, description='Can teach'),
     want_learn: bool = Query(None, description='Want learn'),
+    fields: str = Query(None, description='Comma-separated fields to return'),
     db: Session = Depends(get_db)      
     ):
     """
@@ -60,8 +90,12 @@ def get_skills(
     - **level**: фільтр за рівнем
     - **can_teach**: показати тільки тих, хто може навчати
     - **want_learn**: показати тільки тих, хто хоче вчитися
+    - **fields**: повернути лише вказані поля, наприклад `id,title`
     """
-    query_skills = db.query(Skill)
+    if fields:
+        query_skills = db.query(*select_columns(fields, Skill, SkillResponse))
+    else:
+        query_skills = db.query(Skill)
 
     if category:
         query_skills = query_skills.filter_by(category=category)
@@ -77,6 +111,9 @@ def get_skills(
 
     skills = query_skills.all()
 
+    if fields:
+        return sparse_response(skills)
+
     return skills
 
 
@@ -126,15 +163,15 @@ def del_skill(id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Навичка з ID {id} не знайдена")
 
 
-@app.get('/users', response_model=UserResponse, tags=['Users'])
-def get_users(db: Session = Depends(get_db)):
+@app.get('/users', response_model=List[UserResponse], tags=['Users'])
+def get_users(fields: str = Query(None, description='Comma-separated fields to return'), db: Session = Depends(get_db)):
     """Отримати всіх користовачів"""
+    if fields:
+        return sparse_response(db.query(*select_columns(fields, User, UserResponse)).all())
+
     users = db.query(User).all()
 
-    if users:
-        return users
-    else:
-        return "Не знайдено жодного користовача"
+    return users
     
 
 @app.get('/users/{id}', response_model=UserResponse, tags=['Users'])
@@ -148,6 +185,19 @@ def get_user_by_id(id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Юзера з ID {id} не знайдена")
 
 
+@app.get('/users/{id}/recommendations', response_model=List[SkillResponse], tags=['Users'])
+def get_user_recommendations(id: int, db: Session = Depends(get_db)):
+    """Навички, які можуть зацікавити користувача (попередньо розрахований top-K)"""
+    ids = get_recommendations(db, id)
+
+    if not ids:
+        return []
+
+    skills = {skill.id: skill for skill in db.query(Skill).filter(Skill.id.in_(ids))}
+
+    return [skills[skill_id] for skill_id in ids if skill_id in skills]
+
+
 @app.post('/register', response_model=UserResponse, tags=['Users'])
 def register(data: UserCreate, db: Session = Depends(get_db)):
     user = data.model_dump()
@@ -157,37 +207,22 @@ def register(data: UserCreate, db: Session = Depends(get_db)):
     new_user.set_password(user['password'])
 
     db.add(new_user)
+    db.flush()
+
+    enqueue(db, 'welcome_email', user_id=new_user.id)
+    jti = start_session(db, new_user.id)
+
     db.commit()
     db.refresh(new_user)
+    queue.notify()
 
     user.pop('password')
     user['id'] = new_user.id
 
-    access = create_access(user)
-    refresh = create_refresh(user)
-
-    
-    if access and refresh:
-        res = JSONResponse({'message': 'successfuly created', 'user': user}, status_code=status.HTTP_201_CREATED)
-
-        res.set_cookie(
-            key="access_token",
-            value=access,
-            max_age=900,
-            httponly=True,
-            samesite="lax"
-        )
+    res = JSONResponse({'message': 'successfuly created', 'user': user}, status_code=status.HTTP_201_CREATED)
+    set_auth_cookies(res, user, jti)
 
-        res.set_cookie(
-            key="refresh_token",
-            value=refresh,
-            httponly=True,
-            secure=False,
-            samesite="lax",
-            max_age=60 * 60 * 24 * 7
-        )
-
-        return res    
+    return res
 
 
 @app.post('/login', response_model=UserResponse, tags=['Users'])
@@ -196,76 +231,90 @@ def login(data: UserLogin, db: Session = Depends(get_db)):
 
     db_user = db.query(User).filter_by(username=user.get('username')).first()
 
-    if db_user.check_password(user.get('password')):
-        user['id'] = db_user.id
+    if db_user and db_user.check_password(user.get('password')):
+        user = {'id': db_user.id, 'username': db_user.username}
 
-        access = create_access(user)
-        refresh = create_refresh(user)
+        jti = start_session(db, db_user.id)
+        db.commit()
 
-    
-        if access and refresh:
-            res = JSONResponse({'message': 'successfuly logined'}, status_code=status.HTTP_201_CREATED)
-
-            res.set_cookie(
-                key="access_token",
-                value=access,
-                max_age=900,
-                httponly=True,
-                samesite="lax"
-            )
-
-            res.set_cookie(
-                key="refresh_token",
-                value=refresh,
-                httponly=True,
-                secure=False,
-                samesite="lax",
-                max_age=60 * 60 * 24 * 7
-            )
-
-            return res    
+        res = JSONResponse({'message': 'successfuly logined'}, status_code=status.HTTP_201_CREATED)
+        set_auth_cookies(res, user, jti)
+
+        return res
     else:
         raise HTTPException(detail='Unauthorized', status_code=status.HTTP_401_UNAUTHORIZED)
     
     
 @app.post('/refresh', tags=['Tokens'])
-def refresh(req: Request):
+def refresh(req: Request, db: Session = Depends(get_db)):
+    """Обміняти refresh-токен на нову пару токенів. Старий refresh-токен після цього недійсний."""
     refresh = req.cookies.get('refresh_token')
 
     if refresh:
         payload = verify_token(refresh)
 
-        token = create_access(payload)
+        if not payload or payload.get('type') != 'refresh' or not payload.get('jti'):
+            raise HTTPException(detail='Unauthorized', status_code=status.HTTP_401_UNAUTHORIZED)
 
-        res = JSONResponse({'message': 'token was gived'}, status_code=status.HTTP_201_CREATED)
+        jti = rotate(db, payload['jti'])
 
+        if not jti:
+            raise HTTPException(detail='Unauthorized', status_code=status.HTTP_401_UNAUTHORIZED)
+
+        user = {'id': payload['id'], 'username': payload.get('username')}
+
+        res = JSONResponse({'message': 'token was gived'}, status_code=status.HTTP_201_CREATED)
+        set_auth_cookies(res, user, jti)
 
-        res.set_cookie(
-            key="access_token",
-            value=token,
-            max_age=900,
-            httponly=True,
-            samesite="lax"
-        )
-        
         return res
     else:
         raise HTTPException(detail='Bad request', status_code=status.HTTP_400_BAD_REQUEST)
 
 
+@app.post('/logout/all', tags=['Tokens'])
+def logout_all(db: Session = Depends(get_db), user: dict = Depends(verify_user)):
+    """Вийти з усіх пристроїв: відкликати всі refresh-токени користувача"""
+    revoke_all(db, user.get('id'))
+
+    res = JSONResponse({'message': 'logged out from all devices'}, status_code=status.HTTP_200_OK)
+    clear_auth_cookies(res)
+
+    return res
+
+
 @app.get("/exchanges/received", response_model=List[ExchangeResponse], tags=["Exchanges"])
-def get_received_exchanges(db: Session = Depends(get_db), user: dict = Depends(verify_user)):
+def get_received_exchanges(
+    fields: str = Query(None, description='Comma-separated fields to return'),
+    since: datetime = Query(None, description='Only exchanges created since'),
+    include_archived: bool = Query(False, description='Also search archived exchanges'),
+    db: Session = Depends(get_db),
+    user: dict = Depends(verify_user)
+    ):
     user_id = user.get("id")
 
-    exchanges = db.query(Exchange).filter_by(receiver_id=user_id).all()
+    exchanges = user_exchanges(db, fields, since, include_archived, receiver_id=user_id)
+
+    if fields:
+        return sparse_response(exchanges)
+
     return exchanges
 
 
 @app.get("/exchanges/sent", response_model=List[ExchangeResponse], tags=["Exchanges"])
-def get_sent_exchanges(db: Session = Depends(get_db), user: dict = Depends(verify_user)):
+def get_sent_exchanges(
+    fields: str = Query(None, description='Comma-separated fields to return'),
+    since: datetime = Query(None, description='Only exchanges created since'),
+    include_archived: bool = Query(False, description='Also search archived exchanges'),
+    db: Session = Depends(get_db),
+    user: dict = Depends(verify_user)
+    ):
     user_id = user.get("id")
 
-    exchanges = db.query(Exchange).filter_by(sender_id=user_id).all()
+    exchanges = user_exchanges(db, fields, since, include_archived, sender_id=user_id)
+
+    if fields:
+        return sparse_response(exchanges)
+
     return exchanges
 
 
@@ -284,7 +333,13 @@ def create_exchange(data: ExchangeCreate, db: Session = Depends(get_db), user: d
     )
 
     db.add(new_exchange)
+    db.flush()
+
+    enqueue(db, 'notify_receiver', exchange_id=new_exchange.id)
+    enqueue(db, 'exchange_created', exchange_id=new_exchange.id)
+
     db.commit()
     db.refresh(new_exchange)
+    queue.notify()
 
     return new_exchange
\ No newline at end of file
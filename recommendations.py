@@ -0,0 +1,207 @@
+import sys
+import heapq
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import permutations
+from sqlalchemy import delete, func, update
+from sqlmodel import Session, select
+from db import engine, upsert, Exchange, ExchangeArchive, Recommendation, SkillPair, UserSkillLink
+from jobs import task, enqueue, is_scheduled
+
+TOP_K = 20
+LINK_WEIGHT = 1.0
+EXCHANGE_WEIGHT = 2.0
+REFRESH_DELAY = 5
+REFRESH_BATCH = 500
+
+
+def pack(skill_ids):
+    return array('i', skill_ids).tobytes()
+
+
+def unpack(data: bytes):
+    ids = array('i')
+    ids.frombytes(data)
+    return ids
+
+
+def get_recommendations(db: Session, user_id: int):
+    """Готовий список id навичок для користувача — один запит за первинним ключем"""
+    rec = db.get(Recommendation, user_id)
+
+    if rec:
+        return unpack(rec.skill_ids)
+    return array('i')
+
+
+def user_skill_ids(db: Session, user_id: int):
+    return db.exec(select(UserSkillLink.skill_id).where(UserSkillLink.user_id == user_id)).all()
+
+
+def top_k(scores, own, k: int = TOP_K):
+    """Найкращі `k` навичок за вагою (при рівності — менший id), крім уже наявних у користувача"""
+    candidates = (other_id for other_id, score in scores.items() if score > 0 and other_id not in own)
+    return heapq.nlargest(k, candidates, key=lambda other_id: (scores[other_id], -other_id))
+
+
+def compute_many(db: Session, user_ids):
+    """Перерахувати top-K для групи користувачів одним агрегуючим запитом"""
+    own = defaultdict(set)
+    scores = defaultdict(lambda: defaultdict(float))
+
+    for user_id, skill_id in db.exec(select(UserSkillLink.user_id, UserSkillLink.skill_id).where(UserSkillLink.user_id.in_(user_ids))):
+        own[user_id].add(skill_id)
+
+    query = (
+        select(UserSkillLink.user_id, SkillPair.other_id, func.sum(SkillPair.weight))
+        .join(SkillPair, SkillPair.skill_id == UserSkillLink.skill_id)
+        .where(UserSkillLink.user_id.in_(user_ids))
+        .group_by(UserSkillLink.user_id, SkillPair.other_id)
+    )
+
+    for user_id, other_id, score in db.exec(query):
+        scores[user_id][other_id] = score
+
+    now = datetime.now()
+    rows = [{'user_id': user_id, 'skill_ids': pack(top_k(scores[user_id], own[user_id])), 'stale': False, 'updated_at': now} for user_id in user_ids]
+
+    upsert(db, Recommendation, rows, ['user_id'], lambda new: {'skill_ids': new.skill_ids, 'updated_at': new.updated_at})
+
+
+def bump(db: Session, skill_id: int, others, weight: float):
+    """Атомарно додати `weight` до пар (skill_id, other) в обидва боки"""
+    rows = []
+
+    for other_id in set(others):
+        if other_id != skill_id:
+            rows.append({'skill_id': skill_id, 'other_id': other_id, 'weight': weight})
+            rows.append({'skill_id': other_id, 'other_id': skill_id, 'weight': weight})
+
+    if rows:
+        upsert(db, SkillPair, rows, ['skill_id', 'other_id'], lambda new: {'weight': SkillPair.weight + new.weight})
+
+
+def mark_stale(db: Session, skill_ids, user_id: int = None):
+    """
+    Позначити застарілими списки всіх, хто має одну з `skill_ids`, і запланувати перерахунок.
+
+    Перерахунок відкладено на REFRESH_DELAY і виконується однією задачею,
+    тож серія подій для популярної навички коштує один прохід, а не прохід на подію.
+    Користувачі, у яких ще немає списку, отримують порожній рядок із позначкою stale.
+    """
+    holders = set(db.exec(select(UserSkillLink.user_id).where(UserSkillLink.skill_id.in_(skill_ids)).distinct()).all())
+
+    if user_id:
+        holders.add(user_id)
+
+    # Сортування задає однаковий порядок блокувань для паралельних задач
+    holders = sorted(holders)
+    now = datetime.now()
+
+    for i in range(0, len(holders), REFRESH_BATCH):
+        rows = [{'user_id': holder, 'skill_ids': b'', 'stale': True, 'updated_at': now} for holder in holders[i:i + REFRESH_BATCH]]
+        upsert(db, Recommendation, rows, ['user_id'], lambda new: {'stale': True})
+
+    if not is_scheduled(db, 'refresh_recommendations', statuses=('pending',)):
+        enqueue(db, 'refresh_recommendations', run_at=datetime.now() + timedelta(seconds=REFRESH_DELAY))
+
+
+@task('refresh_recommendations')
+def refresh_recommendations():
+    with Session(engine) as db:
+        while True:
+            user_ids = db.exec(select(Recommendation.user_id).where(Recommendation.stale == True).limit(REFRESH_BATCH)).all()
+
+            if not user_ids:
+                return
+
+            # Скидаємо позначку до перерахунку: подія під час перерахунку позначить користувача знову
+            db.execute(update(Recommendation).where(Recommendation.user_id.in_(user_ids)).values(stale=False))
+            db.commit()
+
+            try:
+                compute_many(db, user_ids)
+                db.commit()
+            except Exception:
+                # Повертаємо позначку, інакше повторна спроба задачі не знайде, що перераховувати
+                db.rollback()
+                db.execute(update(Recommendation).where(Recommendation.user_id.in_(user_ids)).values(stale=True))
+                db.commit()
+                raise
+
+
+@task('skill_link_changed')
+def skill_link_changed(user_id: int, skill_id: int, added: bool = True):
+    """Оновити ваги після додавання або видалення навички у користувача"""
+    with Session(engine) as db:
+        others = [s for s in user_skill_ids(db, user_id) if s != skill_id]
+        bump(db, skill_id, others, LINK_WEIGHT if added else -LINK_WEIGHT)
+
+        mark_stale(db, [skill_id, *others], user_id)
+        db.commit()
+
+
+@task('exchange_created')
+def exchange_created(exchange_id: int):
+    """Запит на обмін підсилює зв'язок навички обміну з навичками отримувача"""
+    with Session(engine) as db:
+        exchange = db.get(Exchange, exchange_id)
+
+        if not exchange:
+            return
+
+        others = user_skill_ids(db, exchange.receiver_id)
+        bump(db, exchange.skill_id, others, EXCHANGE_WEIGHT)
+
+        mark_stale(db, [exchange.skill_id, *others])
+        db.commit()
+
+
+def rebuild(db: Session):
+    """Повністю перерахувати ваги та списки рекомендацій з UserSkillLink, Exchange та ExchangeArchive"""
+    weights = defaultdict(float)
+    user_skills = defaultdict(list)
+
+    for user_id, skill_id in db.exec(select(UserSkillLink.user_id, UserSkillLink.skill_id)):
+        user_skills[user_id].append(skill_id)
+
+    for skills in user_skills.values():
+        for pair in permutations(skills, 2):
+            weights[pair] += LINK_WEIGHT
+
+    # Архівовані обміни теж рахуються: інкрементальний шлях врахував їх при створенні
+    for model in (Exchange, ExchangeArchive):
+        for receiver_id, skill_id in db.exec(select(model.receiver_id, model.skill_id)):
+            for other_id in user_skills.get(receiver_id, ()):
+                if other_id != skill_id:
+                    weights[(skill_id, other_id)] += EXCHANGE_WEIGHT
+                    weights[(other_id, skill_id)] += EXCHANGE_WEIGHT
+
+    neighbours = defaultdict(dict)
+    for (a, b), w in weights.items():
+        neighbours[a][b] = w
+
+    db.execute(delete(Recommendation))
+    db.execute(delete(SkillPair))
+    db.add_all(SkillPair(skill_id=a, other_id=b, weight=w) for (a, b), w in weights.items())
+
+    for user_id, skills in user_skills.items():
+        scores = defaultdict(float)
+
+        for skill_id in skills:
+            for other_id, w in neighbours[skill_id].items():
+                scores[other_id] += w
+
+        db.add(Recommendation(user_id=user_id, skill_ids=pack(top_k(scores, set(skills)))))
+
+    db.commit()
+    return len(user_skills)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['rebuild']:
+        sys.exit('usage: python recommendations.py rebuild')
+
+    with Session(engine) as db:
+        print(f'rebuilt recommendations for {rebuild(db)} users')
@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import signal
+import shutil
+import tempfile
+import multiprocessing
+from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+
+load_dotenv()
+
+HOST = os.getenv('HOST', '0.0.0.0')
+PORT = int(os.getenv('PORT', 8000))
+WORKERS = int(os.getenv('WORKERS', multiprocessing.cpu_count()))
+GRACEFUL_TIMEOUT = int(os.getenv('GRACEFUL_TIMEOUT', 30))
+RUN_DIR = os.getenv('RUN_DIR', os.path.join(tempfile.gettempdir(), 'skillswap'))
+READY_DIR = os.path.join(RUN_DIR, 'ready')
+PIDFILE = os.path.join(RUN_DIR, 'master.pid')
+
+
+def on_starting(server):
+    shutil.rmtree(READY_DIR, ignore_errors=True)
+    os.makedirs(READY_DIR, exist_ok=True)
+
+
+# Модулі застосунку імпортуються лише у воркерах: якщо майстер їх завантажить,
+# нові воркери отримають старі db.py/models.py з його sys.modules
+def post_fork(server, worker):
+    from db import reset_engine
+    reset_engine()
+
+
+def post_worker_init(worker):
+    from db import warm_up
+    warm_up()
+
+
+def mark_ready(app):
+    """Позначка для reload() ставиться, лише коли startup застосунку завершився і воркер приймає запити"""
+    async def wrapper(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            await app(scope, receive, send)
+            return
+
+        async def send_ready(message):
+            await send(message)
+
+            if message['type'] == 'lifespan.startup.complete':
+                open(os.path.join(READY_DIR, str(os.getpid())), 'w').close()
+
+        await app(scope, receive, send_ready)
+
+    return wrapper
+
+
+def worker_exit(server, worker):
+    try:
+        os.remove(os.path.join(READY_DIR, str(worker.pid)))
+    except FileNotFoundError:
+        pass
+
+
+def ready_workers():
+    return set(os.listdir(READY_DIR))
+
+
+def reload(timeout: float = 120):
+    """
+    Поступовий перезапуск без простою.
+
+    Майстру надсилається TTIN стільки разів, скільки зараз воркерів: він
+    запускає стільки ж нових, які заново імпортують код і прогріваються.
+    Коли всі нові завершили startup і позначились у READY_DIR, TTOU повертає кількість назад —
+    gunicorn зупиняє найстаріших воркерів, тобто старий код, і дає їм
+    GRACEFUL_TIMEOUT на завершення запитів.
+
+    Звичайний `kill -HUP` так не робить: старі воркери отримують SIGTERM
+    одразу, поки нові ще стартують.
+    """
+    with open(PIDFILE) as f:
+        master = int(f.read())
+
+    old = ready_workers()
+
+    for _ in old:
+        os.kill(master, signal.SIGTTIN)
+        time.sleep(0.1)
+
+    deadline = time.time() + timeout
+    while len(ready_workers() - old) < len(old):
+        if time.time() > deadline:
+            raise RuntimeError('Нові воркери не прогрілись, старі залишаються працювати')
+        time.sleep(0.2)
+
+    for _ in old:
+        os.kill(master, signal.SIGTTOU)
+        time.sleep(0.1)
+
+
+class Server(BaseApplication):
+    """
+    Запуск API у кількох воркерах gunicorn з uvicorn-воркерами.
+
+    - **WORKERS**: кількість воркерів (за замовчуванням кількість ядер)
+    - **HOST**, **PORT**: адреса сервера
+    - **GRACEFUL_TIMEOUT**: скільки секунд чекати завершення запитів при зупинці воркера
+    - **RUN_DIR**: де зберігаються pid майстра та позначки готових воркерів
+
+    Перезапуск без простою: `python server.py reload` (див. `reload`).
+    """
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for k, v in self.options.items():
+            self.cfg.set(k, v)
+
+    def load(self):
+        from main import app
+        return mark_ready(app)
+
+
+def run(workers: int = WORKERS, bind: str = f'{HOST}:{PORT}'):
+    os.makedirs(RUN_DIR, exist_ok=True)
+
+    options = {
+        'bind': bind,
+        'workers': workers,
+        'worker_class': 'uvicorn.workers.UvicornWorker',
+        'preload_app': False,
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        'pidfile': PIDFILE,
+        'on_starting': on_starting,
+        'post_fork': post_fork,
+        'post_worker_init': post_worker_init,
+        'worker_exit': worker_exit,
+    }
+
+    Server(options).run()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['reload']:
+        reload()
+    else:
+        run()
@@ -0,0 +1,169 @@
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update
+from sqlmodel import Session, select
+from fastapi.responses import Response
+from db import engine, UserSession
+from tokens import create_access, create_refresh, ACCESS_TTL, REFRESH_TTL
+from jobs import periodic
+
+INDEX_SIZE = 100_000
+PURGE_INTERVAL_MINUTES = int(os.getenv('SESSION_PURGE_INTERVAL_MINUTES', 60))
+PURGE_BATCH = 5000
+
+
+class SessionIndex:
+    """
+    Кеш сесій у пам'яті процесу: jti -> (user_id, family, revoked).
+
+    Джерело істини — таблиця usersession. Кеш лише економить запити:
+    відкликану сесію не можна відновити, тож `revoked=True` з кешу завжди вірне,
+    а активна сесія все одно перевіряється умовним UPDATE під час ротації.
+    Endpoints виконуються в пулі потоків, тому доступ до OrderedDict під блокуванням.
+    """
+
+    def __init__(self, size: int = INDEX_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, jti: str):
+        with self.lock:
+            entry = self.entries.get(jti)
+            if entry:
+                self.entries.move_to_end(jti)
+            return entry
+
+    def put(self, jti: str, user_id: int, family: str, revoked: bool = False):
+        with self.lock:
+            self.entries[jti] = (user_id, family, revoked)
+            self.entries.move_to_end(jti)
+
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+index = SessionIndex()
+
+
+def start_session(db: Session, user_id: int, family: str = None):
+    jti = secrets.token_urlsafe(16)
+    family = family or jti
+
+    db.add(UserSession(jti=jti, family=family, user_id=user_id, expires_at=datetime.now() + timedelta(seconds=REFRESH_TTL)))
+    index.put(jti, user_id, family)
+
+    return jti
+
+
+def find_session(db: Session, jti: str):
+    entry = index.get(jti)
+
+    if entry:
+        return entry
+
+    session = db.get(UserSession, jti)
+
+    if session:
+        index.put(jti, session.user_id, session.family, session.revoked)
+        return session.user_id, session.family, session.revoked
+
+
+def revoke_family(db: Session, family: str):
+    db.execute(update(UserSession).where(UserSession.family == family).values(revoked=True))
+
+
+def revoke_all(db: Session, user_id: int):
+    """Вийти з усіх пристроїв: відкликати всі refresh-токени користувача"""
+    db.execute(update(UserSession).where(UserSession.user_id == user_id, UserSession.revoked == False).values(revoked=True))
+    db.commit()
+
+
+def rotate(db: Session, jti: str):
+    """
+    Обміняти refresh-токен на новий у тій самій сім'ї.
+
+    Повертає новий jti або None, якщо токен невідомий, прострочений чи вже використаний.
+    Повторне використання вже ротованого токена означає, що його вкрали,
+    тому відкликається вся сім'я токенів цього пристрою.
+    """
+    found = find_session(db, jti)
+
+    if not found:
+        return None
+
+    user_id, family, revoked = found
+
+    if not revoked:
+        result = db.execute(
+            update(UserSession)
+            .where(UserSession.jti == jti, UserSession.revoked == False, UserSession.expires_at > datetime.now())
+            .values(revoked=True)
+        )
+        revoked = result.rowcount != 1
+
+    index.put(jti, user_id, family, True)
+
+    if revoked:
+        revoke_family(db, family)
+        db.commit()
+        return None
+
+    new_jti = start_session(db, user_id, family)
+    db.commit()
+
+    return new_jti
+
+
+def purge_expired(db: Session, batch_size: int = PURGE_BATCH):
+    """
+    Видалити сесії, строк дії яких минув.
+
+    Ротовані та відкликані сесії живуть до `expires_at`, щоб виявляти повторне
+    використання; після цього їхній refresh-токен і так не пройде перевірку exp.
+    """
+    purged = 0
+
+    while True:
+        jtis = db.exec(select(UserSession.jti).where(UserSession.expires_at < datetime.now()).limit(batch_size)).all()
+
+        if not jtis:
+            return purged
+
+        db.execute(delete(UserSession).where(UserSession.jti.in_(jtis)))
+        db.commit()
+
+        purged += len(jtis)
+
+
+@periodic('purge_sessions', timedelta(minutes=PURGE_INTERVAL_MINUTES))
+def purge_sessions_job():
+    with Session(engine) as db:
+        purge_expired(db)
+
+
+def set_auth_cookies(res: Response, user: dict, jti: str):
+    res.set_cookie(
+        key="access_token",
+        value=create_access(user),
+        max_age=ACCESS_TTL,
+        httponly=True,
+        samesite="lax"
+    )
+
+    res.set_cookie(
+        key="refresh_token",
+        value=create_refresh(user, jti),
+        httponly=True,
+        secure=False,
+        samesite="lax",
+        max_age=REFRESH_TTL
+    )
+
+
+def clear_auth_cookies(res: Response):
+    res.delete_cookie("access_token")
+    res.delete_cookie("refresh_token")
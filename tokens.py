@@ -1,8 +1,11 @@
 import jwt
+import json
+import time
 from jwt import PyJWTError
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_encode
 import os
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
 from fastapi.requests import Request
 from fastapi import HTTPException, status
 
@@ -11,17 +14,27 @@ load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGHORITM')
 
+ACCESS_TTL = 30 * 60
+REFRESH_TTL = 24 * 60 * 60
+
+# Заголовок і ключ однакові для всіх токенів, тому готуємо їх один раз
+_algorithm = get_default_algorithms()[ALGORITHM]
+_key = _algorithm.prepare_key(SECRET_KEY)
+_header = base64url_encode(json.dumps({'alg': ALGORITHM, 'typ': 'JWT'}, separators=(',', ':')).encode())
+
+
+def sign(payload: dict):
+    body = base64url_encode(json.dumps(payload, separators=(',', ':')).encode())
+    signing_input = _header + b'.' + body
+    return (signing_input + b'.' + base64url_encode(_algorithm.sign(signing_input, _key))).decode()
+
+
 def create_access(data: dict):
-    payload = data.copy()
-    payload['exp'] = datetime.now() + timedelta(minutes=30)
-    payload['type'] = 'access'
-    return jwt.encode(payload=payload, key=SECRET_KEY, algorithm=ALGORITHM)
+    return sign({'id': data['id'], 'username': data.get('username'), 'type': 'access', 'exp': int(time.time()) + ACCESS_TTL})
+
 
-def create_refresh(data: dict):
-    payload = data.copy()
-    payload['exp'] = datetime.now() + timedelta(days=1)
-    payload['type'] = 'refresh'
-    return jwt.encode(payload=payload, key=SECRET_KEY, algorithm=ALGORITHM)
+def create_refresh(data: dict, jti: str):
+    return sign({'id': data['id'], 'username': data.get('username'), 'type': 'refresh', 'jti': jti, 'exp': int(time.time()) + REFRESH_TTL})
 
 
 def verify_token(token: str):
@@ -30,7 +43,7 @@ def verify_token(token: str):
         return payload
     except PyJWTError:
         return None
-    
+
 
 def verify_user(req: Request):
     access = req.cookies.get('access_token')
@@ -38,7 +51,7 @@ def verify_user(req: Request):
     if access:
         payload = verify_token(access)
 
-        if payload:
+        if payload and payload.get('type') == 'access':
             return payload
         else:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='UNAUTHORIZED')